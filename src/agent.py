@@ -2,15 +2,18 @@ import os
 import time
 import json
 import yaml
+import orjson
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any, Tuple
+import httpx
 import openai
 from loguru import logger
 from database import ArticleDatabase
 
 class PhysicsArticleCurator:
-    def __init__(self, config_path="config.yaml"):
+    def __init__(self, config_path="config.yaml", state_path="data/agent_state.json"):
         """Initialize the agent with configuration"""
         # Load configuration
         self.config = self._load_config(config_path)
@@ -21,8 +24,14 @@ class PhysicsArticleCurator:
         # Initialize database
         self.db = ArticleDatabase()
         
+        # Load state saved by a previous run
+        self.state_path = state_path
+        self._saved_state = None
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        state = self._load_state()
+        
         # Initialize OpenAI client
-        self._setup_openai()
+        self._setup_openai(use_responses_api=state.get("use_responses_api"))
         
         # Agent state
         self.name = self.config["agent"]["name"]
@@ -37,6 +46,11 @@ class PhysicsArticleCurator:
             "Statistics": {}
         }
         
+        # Restore learned memory (identity always comes from the current config)
+        for section, content in state.get("memory", {}).items():
+            if section in self.memory and section != "Agent Identity and Goal":
+                self.memory[section] = content
+        
         logger.info(f"Agent '{self.name}' initialized with goal: {self.goal}")
     
     def _load_config(self, config_path: str) -> Dict[str, Any]:
@@ -75,18 +89,72 @@ class PhysicsArticleCurator:
         """Configure logging"""
         os.makedirs("logs", exist_ok=True)
         log_file = f"logs/agent_{datetime.now().strftime('%Y%m%d')}.log"
-        logger.add(log_file, rotation="1 day", retention="7 days", level="INFO")
+        # enqueue=True hands records to loguru's background writer thread so
+        # the agent loop never blocks on file I/O
+        logger.add(
+            log_file,
+            rotation="1 day",
+            retention="7 days",
+            level="INFO",
+            enqueue=True,
+            backtrace=False,
+            diagnose=False
+        )
+    
+    def _load_state(self) -> Dict[str, Any]:
+        """Load agent state saved by a previous run"""
+        try:
+            with open(self.state_path, 'rb') as f:
+                state = orjson.loads(f.read())
+            logger.info(f"Loaded agent state from {self.state_path}")
+            return state if isinstance(state, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Error loading agent state: {e}")
+            return {}
     
-    def _setup_openai(self):
+    def _save_state(self):
+        """Save agent memory and API selection so they survive restarts"""
+        try:
+            data = orjson.dumps({
+                "memory": self.memory,
+                "use_responses_api": self.use_responses_api
+            })
+            
+            # Nothing changed since the last save, skip the write
+            if data == self._saved_state:
+                return
+            
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.state_path)
+            self._saved_state = data
+        except Exception as e:
+            logger.error(f"Error saving agent state: {e}")
+    
+    def _setup_openai(self, use_responses_api=None):
         """Initialize OpenAI client"""
         api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
             logger.error("OPENAI_API_KEY environment variable not set")
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
-        self.client = openai.OpenAI(api_key=api_key)
+        # Share one pooled keep-alive HTTP client across all API calls, keeping the SDK's
+        # default timeout since web search responses can take minutes
+        self.http_client = openai.DefaultHttpxClient(
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+        self.client = openai.OpenAI(api_key=api_key, http_client=self.http_client)
         logger.info("OpenAI client initialized")
         
+        # Reuse a previous run's successful API test; a saved failure may have been transient, so re-test
+        if use_responses_api:
+            self.use_responses_api = True
+            logger.info("Using saved API selection (responses API: True)")
+            return
+        
         # Test if the client can access the responses API
         try:
             # Make a simple call to test connectivity
@@ -147,6 +215,9 @@ class PhysicsArticleCurator:
         
         while True:
             try:
+                # Cycles start on a fixed cadence regardless of how long each one takes
+                next_run = time.monotonic() + self.action_interval
+                
                 # Run one cycle of the agent
                 self.run_once()
                 
@@ -164,8 +235,9 @@ class PhysicsArticleCurator:
                     }
                 
                 # Sleep until next cycle
-                logger.info(f"Sleeping for {self.action_interval} seconds")
-                time.sleep(self.action_interval)
+                sleep_seconds = max(0, next_run - time.monotonic())
+                logger.info(f"Sleeping for {sleep_seconds:.0f} seconds")
+                time.sleep(sleep_seconds)
                 
             except KeyboardInterrupt:
                 logger.info("Agent stopped by user")
@@ -188,6 +260,9 @@ class PhysicsArticleCurator:
         # Step 3: Reflect and update search topics
         self.reflect_and_update_topics()
         
+        # Step 4: Persist memory for the next run
+        self._save_state()
+        
         logger.info(f"Completed agent cycle. Found {len(articles)} new articles, processed {processed_count}.")
     
     def find_physics_articles(self) -> List[Dict[str, Any]]:
@@ -200,15 +275,22 @@ class PhysicsArticleCurator:
         # Randomly select 2-3 topics to search for this cycle
         topics_to_search = random.sample(search_topics, min(3, len(search_topics)))
         
+        # Search all selected topics with a single request
+        results_by_topic = self._search_for_articles_multi(topics_to_search)
+        
         all_articles = []
         for topic in topics_to_search:
             try:
-                articles = self._search_for_articles(topic)
+                articles = results_by_topic.get(topic)
+                
+                # Fall back to a per-topic search if the batched response missed this topic
+                if articles is None:
+                    articles = self._search_for_articles(topic)
+                
                 all_articles.extend(articles)
                 
                 # Add articles to database
-                for article in articles:
-                    self.db.add_article(article)
+                self.db.add_articles(articles)
                 
                 logger.info(f"Found {len(articles)} articles for topic: {topic}")
             except Exception as e:
@@ -243,40 +325,15 @@ class PhysicsArticleCurator:
         """
         
         try:
-            # Try new Responses API first
-            if hasattr(self, 'use_responses_api') and self.use_responses_api:
-                try:
-                    response = self.client.responses.create(
-                        model=self.config["model"]["model_id"],
-                        tools=[{"type": "web_search_preview"}],
-                        tool_choice={"type": "web_search_preview"},
-                        input=prompt
-                    )
-                    content = response.output_text
-                    logger.info("Successfully used responses API for search")
-                except Exception as e:
-                    logger.error(f"Error with responses API: {e}")
-                    content = None
-            else:
-                content = None
-                
-            # Fall back to chat completions API if needed
-            if content is None:
-                response = self.client.chat.completions.create(
-                    model=self.config["model"]["model_id"],
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.5,
-                    max_tokens=self.config["model"]["max_search_tokens"],
-                )
-                content = response.choices[0].message.content
-                logger.info("Used chat completions API for search")
+            content = self._run_search_prompt(prompt)
             
             # Extract JSON from the response (handling potential text around the JSON)
             articles = self._extract_json_from_response(content)
             
-            # Add discovery date
+            # Add discovery date (shared by every article in this batch)
+            discovery_date = datetime.now().isoformat()
             for article in articles:
-                article["discovery_date"] = datetime.now().isoformat()
+                article["discovery_date"] = discovery_date
             
             return articles
             
@@ -284,6 +341,101 @@ class PhysicsArticleCurator:
             logger.error(f"Error in web search: {e}")
             return []
     
+    def _search_for_articles_multi(self, topics: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Search for articles on several topics with one OpenAI web search request"""
+        logger.info(f"Searching for articles on {len(topics)} topics")
+        
+        topics_text = "\n".join(f"- {topic}" for topic in topics)
+        
+        # Construct a search prompt covering every topic
+        prompt = f"""
+        You're a physics research assistant looking for the latest physics articles and research papers.
+        Search for recent, high-quality physics articles on each of the following topics:
+        {topics_text}
+        
+        For each article found, extract the following details in a structured format:
+        - Title
+        - URL
+        - Source/Publication
+        - Publication date (if available)
+        - A brief snippet of the content
+        
+        ONLY return articles that are related to physics research or news.
+        Format your findings as a single JSON object whose keys are the topics exactly as written above
+        and whose values are JSON arrays of article objects.
+        """
+        
+        try:
+            content = self._run_search_prompt(prompt)
+            parsed = self._extract_json_object_from_response(content)
+            
+            # Add discovery date (shared by every article in this batch)
+            discovery_date = datetime.now().isoformat()
+            
+            # Keep the article objects of each requested topic; topics left without any fall back to a single search
+            results = {}
+            for topic in topics:
+                items = parsed.get(topic)
+                if not isinstance(items, list):
+                    continue
+                
+                articles = [item for item in items if isinstance(item, dict)]
+                if len(articles) < len(items):
+                    logger.warning(f"Dropped {len(items) - len(articles)} malformed results for topic: {topic}")
+                
+                for article in articles:
+                    article["discovery_date"] = discovery_date
+                
+                if articles:
+                    results[topic] = articles
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in batched web search: {e}")
+            return {}
+    
+    def _complete(self, prompt: str, temperature: float, max_tokens: int, web_search: bool = False) -> str:
+        """Run a prompt through the responses API, falling back to chat completions"""
+        # Try new Responses API first
+        content = None
+        if hasattr(self, 'use_responses_api') and self.use_responses_api:
+            try:
+                kwargs = {}
+                if web_search:
+                    kwargs["tools"] = [{"type": "web_search_preview"}]
+                    kwargs["tool_choice"] = {"type": "web_search_preview"}
+                response = self.client.responses.create(
+                    model=self.config["model"]["model_id"],
+                    input=prompt,
+                    **kwargs
+                )
+                content = response.output_text
+            except Exception as e:
+                logger.error(f"Error with responses API: {e}")
+                content = None
+            
+        # Fall back to chat completions API if needed
+        if content is None:
+            response = self.client.chat.completions.create(
+                model=self.config["model"]["model_id"],
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+            content = response.choices[0].message.content
+        
+        return content
+    
+    def _run_search_prompt(self, prompt: str) -> str:
+        """Run a web search prompt and return the raw response text"""
+        return self._complete(
+            prompt,
+            temperature=0.5,
+            max_tokens=self.config["model"]["max_search_tokens"],
+            web_search=True
+        )
+    
     def _extract_json_from_response(self, content: str) -> List[Dict[str, Any]]:
         """Extract JSON array from response text which may have additional text"""
         try:
@@ -306,18 +458,41 @@ class PhysicsArticleCurator:
                 logger.error(f"Error extracting JSON from response: {e}")
                 return []
     
+    def _extract_json_object_from_response(self, content: str) -> Dict[str, Any]:
+        """Extract JSON object from response text which may have additional text"""
+        try:
+            # Try to parse the entire response as JSON
+            parsed = json.loads(content)
+        except:
+            # If that fails, try to find the JSON object in the text
+            try:
+                start_idx = content.find('{')
+                end_idx = content.rfind('}') + 1
+                
+                if start_idx >= 0 and end_idx > start_idx:
+                    parsed = json.loads(content[start_idx:end_idx])
+                else:
+                    logger.warning("Could not find JSON object in response")
+                    return {}
+            except Exception as e:
+                logger.error(f"Error extracting JSON object from response: {e}")
+                return {}
+        
+        return parsed if isinstance(parsed, dict) else {}
+    
     def process_articles(self) -> int:
         """Process unanalyzed articles in the database"""
         # Get unprocessed articles
         articles = self.db.get_unprocessed_articles(limit=5)
         logger.info(f"Processing {len(articles)} unprocessed articles")
         
+        # Analyze articles concurrently; each call is an independent network round-trip
+        with ThreadPoolExecutor(max_workers=max(1, len(articles))) as executor:
+            results = list(executor.map(self._analyze_article, articles))
+        
         processed_count = 0
-        for article in articles:
+        for article, result in zip(articles, results):
             try:
-                # Analyze the article
-                result = self._analyze_article(article)
-                
                 # Update the article in the database
                 self.db.update_article(article["id"], {
                     "summary": result["summary"],
@@ -336,7 +511,7 @@ class PhysicsArticleCurator:
     
     def _analyze_article(self, article: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze a physics article for summary, keywords, and score"""
-        logger.info(f"Analyzing article: {article['title']}")
+        logger.debug("Analyzing article: {}", article['title'])
         
         # Construct a prompt for analysis
         prompt = f"""
@@ -359,29 +534,11 @@ class PhysicsArticleCurator:
         """
         
         try:
-            # Get content from API
-            content = None
-            if hasattr(self, 'use_responses_api') and self.use_responses_api:
-                # Use responses API
-                try:
-                    response = self.client.responses.create(
-                        model=self.config["model"]["model_id"],
-                        input=prompt
-                    )
-                    content = response.output_text
-                except Exception as api_error:
-                    logger.error(f"Error with responses API: {api_error}")
-                    content = None
-            
-            # Fall back to chat completions if needed
-            if content is None:
-                response = self.client.chat.completions.create(
-                    model=self.config["model"]["model_id"],
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.3,
-                    max_tokens=self.config["model"]["max_analysis_tokens"],
-                )
-                content = response.choices[0].message.content
+            content = self._complete(
+                prompt,
+                temperature=0.3,
+                max_tokens=self.config["model"]["max_analysis_tokens"]
+            )
             
             # Extract JSON from response
             analysis = self._extract_json_from_response(content)
@@ -419,18 +576,24 @@ class PhysicsArticleCurator:
                 "score": 5.0
             }
     
+    def _format_article_for_reflection(self, article: Dict[str, Any]) -> str:
+        """Format a processed article as a block for the reflection prompt"""
+        keywords = article['keywords'] if isinstance(article['keywords'], list) else []
+        return (
+            f"Title: {article['title']}\n"
+            f"Keywords: {', '.join(keywords)}\n"
+            f"Score: {article['score']}"
+        )
+    
     def reflect_and_update_topics(self):
         """Reflect on recent findings and update search topics"""
         logger.info("Reflecting and updating search topics")
         
         # Get recent article data
         recent_articles = self.db.get_recent_articles(limit=10)
-        article_info = ""
-        
-        for article in recent_articles:
-            article_info += f"Title: {article['title']}\n"
-            article_info += f"Keywords: {', '.join(article['keywords'] if isinstance(article['keywords'], list) else [])}\n"
-            article_info += f"Score: {article['score']}\n\n"
+        article_info = "\n\n".join(
+            self._format_article_for_reflection(article) for article in recent_articles
+        )
         
         # Current topics
         current_topics = self.memory["Search Topics"]
@@ -459,40 +622,15 @@ class PhysicsArticleCurator:
         """
         
         try:
-            # Get content from API
-            content = None
-            if hasattr(self, 'use_responses_api') and self.use_responses_api:
-                # Use responses API
-                try:
-                    response = self.client.responses.create(
-                        model=self.config["model"]["model_id"],
-                        input=prompt
-                    )
-                    content = response.output_text
-                except Exception as api_error:
-                    logger.error(f"Error with responses API: {api_error}")
-                    content = None
-            
-            # Fall back to chat completions if needed
-            if content is None:
-                response = self.client.chat.completions.create(
-                    model=self.config["model"]["model_id"],
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.7,
-                    max_tokens=1000,
-                )
-                content = response.choices[0].message.content
-            
-            # Extract topics (one per line)
-            new_topics = [
-                topic.strip() for topic in content.strip().split("\n")
-                if topic.strip() and not topic.startswith(("#", "-", "*", "1.", "2."))
-            ]
+            content = self._complete(prompt, temperature=0.7, max_tokens=1000)
             
-            # Filter out any non-topic lines
+            # Extract topics (one per line), skipping headings, bullets and non-topic lines
             new_topics = [
-                topic for topic in new_topics 
-                if len(topic.split()) >= 2 and len(topic) < 100
+                topic for topic in (line.strip() for line in content.strip().split("\n"))
+                if topic
+                and not topic.startswith(("#", "-", "*", "1.", "2."))
+                and len(topic.split()) >= 2
+                and len(topic) < 100
             ]
             
             # Update search topics if we have enough
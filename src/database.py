@@ -1,44 +1,170 @@
 import os
-import sqlite3
-import json
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
+import orjson
 from loguru import logger
 
+# Prefer the bundled, newer SQLite build from pysqlite3-binary when it is installed
+try:
+    from pysqlite3 import dbapi2 as sqlite3
+except ImportError:
+    import sqlite3
+
+def _convert_json(value):
+    """Decode a JSON column value, treating legacy non-JSON text as an empty list"""
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return []
+
+# Lists are stored as JSON text and columns declared JSON come back decoded
+sqlite3.register_adapter(list, lambda value: orjson.dumps(value).decode())
+sqlite3.register_converter("JSON", _convert_json)
+
+_ARTICLES_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS {name} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    url TEXT UNIQUE NOT NULL,
+    source TEXT NOT NULL,
+    publication_date TEXT,
+    discovery_date TEXT NOT NULL,
+    summary TEXT,
+    score REAL,
+    keywords JSON,
+    content_snippet TEXT,
+    processed BOOLEAN DEFAULT FALSE
+)
+'''
+
+_ARTICLES_COLUMNS = (
+    "id, title, url, source, publication_date, discovery_date, "
+    "summary, score, keywords, content_snippet, processed"
+)
+
+# Same columns qualified for queries that join articles as "a"
+_ARTICLES_COLUMNS_A = ", ".join(f"a.{column}" for column in _ARTICLES_COLUMNS.split(", "))
+
+# Python types SQLite can bind directly as column values
+_SCALAR_TYPES = (str, int, float, type(None))
+
+@lru_cache(maxsize=32)
+def _update_article_sql(columns):
+    """Build the UPDATE statement for a tuple of article columns"""
+    set_clause = ", ".join(f"{column} = ?" for column in columns)
+    return f"UPDATE articles SET {set_clause} WHERE id = ?"
+
 class ArticleDatabase:
     def __init__(self, db_path="data/articles.db"):
         # Create data directory if it doesn't exist
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
         self.db_path = db_path
+        
+        # One long-lived connection per instance, shared by this instance's threads
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        self._formatters_registered = False
+        
         self.initialize_database()
         logger.info(f"Database initialized at {db_path}")
     
+    def _connect(self):
+        """Open the database connection and apply per-connection settings"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=256,
+            detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        conn.row_factory = sqlite3.Row
+        
+        # WAL lets the web server read while the agent writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+    
+    @contextmanager
     def get_connection(self):
-        """Create and return a database connection"""
-        return sqlite3.connect(self.db_path)
+        """Yield the shared connection inside a transaction, one thread at a time"""
+        with self._lock:
+            with self._conn:
+                yield self._conn
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
     
     def initialize_database(self):
         """Create the database tables if they don't exist"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            # Apply schema changes and migrations atomically
+            cursor.execute("BEGIN")
+            
             # Create articles table
+            cursor.execute(_ARTICLES_TABLE_SQL.format(name="articles"))
+            
+            # Upgrade databases created with a plain TEXT keywords column
+            self._migrate_keywords_column(cursor)
+            
+            # Add columns introduced after the original schema
+            self._migrate_discovery_day(cursor)
+            
+            # Index the columns the read paths filter and sort on
             cursor.execute('''
-            CREATE TABLE IF NOT EXISTS articles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                url TEXT UNIQUE NOT NULL,
-                source TEXT NOT NULL,
-                publication_date TEXT,
-                discovery_date TEXT NOT NULL,
-                summary TEXT,
-                score REAL,
-                keywords TEXT,
-                content_snippet TEXT,
-                processed BOOLEAN DEFAULT FALSE
+            CREATE INDEX IF NOT EXISTS idx_articles_proc_disc
+            ON articles(processed, discovery_date DESC)
+            ''')
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_articles_day
+            ON articles(discovery_day, processed)
+            ''')
+            
+            # Create full-text index over the searchable article columns
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'")
+            fts_exists = cursor.fetchone() is not None
+            
+            cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, summary, keywords,
+                content='articles', content_rowid='id'
             )
             ''')
             
+            # Keep the full-text index in sync with the articles table
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts(rowid, title, summary, keywords)
+                VALUES (new.id, new.title, new.summary, new.keywords);
+            END
+            ''')
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, summary, keywords)
+                VALUES ('delete', old.id, old.title, old.summary, old.keywords);
+            END
+            ''')
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE OF title, summary, keywords ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, summary, keywords)
+                VALUES ('delete', old.id, old.title, old.summary, old.keywords);
+                INSERT INTO articles_fts(rowid, title, summary, keywords)
+                VALUES (new.id, new.title, new.summary, new.keywords);
+            END
+            ''')
+            
+            # Index articles stored before the full-text table existed
+            if not fts_exists:
+                cursor.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+            
             # Create statistics table
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS statistics (
@@ -53,54 +179,134 @@ class ArticleDatabase:
             
             conn.commit()
     
+    def _migrate_keywords_column(self, cursor):
+        """Rebuild an articles table created before keywords was declared as JSON"""
+        cursor.execute("PRAGMA table_info(articles)")
+        column_types = {row['name']: row['type'] for row in cursor.fetchall()}
+        if column_types.get('keywords') == 'JSON':
+            return
+        
+        logger.info("Migrating articles.keywords column to JSON")
+        cursor.execute(_ARTICLES_TABLE_SQL.format(name="articles_migrated"))
+        cursor.execute(f"INSERT INTO articles_migrated ({_ARTICLES_COLUMNS}) SELECT {_ARTICLES_COLUMNS} FROM articles")
+        
+        # Dropping the old table also drops its indexes and triggers, which are recreated afterwards
+        cursor.execute("DROP TABLE articles")
+        cursor.execute("ALTER TABLE articles_migrated RENAME TO articles")
+    
+    def _migrate_discovery_day(self, cursor):
+        """Add the indexed calendar-day column used by the daily statistics"""
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] >= 1:
+            return
+        
+        logger.info("Adding articles.discovery_day column")
+        cursor.execute('''
+        ALTER TABLE articles ADD COLUMN discovery_day TEXT
+        GENERATED ALWAYS AS (substr(discovery_date, 1, 10)) VIRTUAL
+        ''')
+        cursor.execute("DROP INDEX IF EXISTS idx_articles_disc")
+        cursor.execute("PRAGMA user_version = 1")
+    
     def add_article(self, article_data):
         """Add a new article to the database"""
         try:
+            row = self._article_row(article_data, datetime.now().isoformat())
+            if row is None:
+                return False
+            
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Check if article already exists by URL
-                cursor.execute("SELECT id FROM articles WHERE url = ?", (article_data['url'],))
-                existing = cursor.fetchone()
-                
-                if existing:
-                    logger.info(f"Article already exists in database: {article_data['title']}")
-                    return False
-                
-                # Set discovery date if not provided
-                if 'discovery_date' not in article_data:
-                    article_data['discovery_date'] = datetime.now().isoformat()
-                
-                # Convert keywords list to JSON string if it's a list
-                if 'keywords' in article_data and isinstance(article_data['keywords'], list):
-                    article_data['keywords'] = json.dumps(article_data['keywords'])
+                # The UNIQUE url constraint resolves duplicates in the same statement
+                cursor = conn.execute('''
+                INSERT INTO articles (
+                    title, url, source, publication_date, discovery_date,
+                    summary, score, keywords, content_snippet, processed
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO NOTHING
+                RETURNING id
+                ''', row)
+                inserted = cursor.fetchone() is not None
+            
+            if not inserted:
+                logger.info(f"Article already exists in database: {article_data.get('title')}")
+                return False
+            
+            logger.info(f"Added new article: {article_data.get('title')}")
+            return True
                 
-                # Insert article into database
-                cursor.execute('''
+        except Exception as e:
+            logger.error(f"Error adding article: {e}")
+            return False
+    
+    def add_articles(self, articles):
+        """Add new articles in a single transaction, skipping URLs already stored"""
+        try:
+            discovery_date = datetime.now().isoformat()
+            rows = [self._article_row(article, discovery_date) for article in articles]
+            valid_rows = [row for row in rows if row is not None]
+            rejected = len(rows) - len(valid_rows)
+            if not valid_rows:
+                if rejected:
+                    logger.info(f"Added 0 new articles (0 already in database, {rejected} rejected)")
+                return 0
+            
+            with self.get_connection() as conn:
+                # Only duplicate URLs are skipped; any other constraint error still aborts the batch
+                cursor = conn.executemany('''
                 INSERT INTO articles (
                     title, url, source, publication_date, discovery_date,
                     summary, score, keywords, content_snippet, processed
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    article_data.get('title', ''),
-                    article_data.get('url', ''),
-                    article_data.get('source', ''),
-                    article_data.get('publication_date', ''),
-                    article_data.get('discovery_date', ''),
-                    article_data.get('summary', ''),
-                    article_data.get('score', 0.0),
-                    article_data.get('keywords', ''),
-                    article_data.get('content_snippet', ''),
-                    article_data.get('processed', False)
-                ))
+                ON CONFLICT(url) DO NOTHING
+                ''', valid_rows)
                 
+                added = cursor.rowcount
                 conn.commit()
-                logger.info(f"Added new article: {article_data['title']}")
-                return True
+            
+            logger.info(
+                f"Added {added} new articles "
+                f"({len(valid_rows) - added} already in database, {rejected} rejected)"
+            )
+            return added
                 
         except Exception as e:
-            logger.error(f"Error adding article: {e}")
-            return False
+            logger.error(f"Error adding articles: {e}")
+            return 0
+    
+    def _has_title_and_url(self, article_data):
+        """Check that an article has the non-empty title and URL it is stored under"""
+        return bool(article_data.get('title')) and bool(article_data.get('url'))
+    
+    def _article_row(self, article_data, discovery_date):
+        """Build the INSERT parameters for an article, or None (logged) if it can't be stored"""
+        if not isinstance(article_data, dict) or not self._has_title_and_url(article_data):
+            logger.warning(f"Rejected article without a title or URL: {article_data}")
+            return None
+        
+        # Missing or null text fields become empty strings so NOT NULL columns always bind
+        row = (
+            article_data.get('title') or '',
+            article_data.get('url') or '',
+            article_data.get('source') or '',
+            article_data.get('publication_date') or '',
+            article_data.get('discovery_date') or discovery_date,
+            article_data.get('summary') or '',
+            article_data.get('score', 0.0),
+            article_data.get('keywords') or [],
+            article_data.get('content_snippet') or '',
+            article_data.get('processed', False)
+        )
+        
+        # Model output can put lists or objects in any field, which SQLite can't bind
+        keywords = row[7]
+        scalars = row[:7] + row[8:]
+        if (not all(isinstance(value, _SCALAR_TYPES) for value in scalars)
+                or not isinstance(keywords, list)
+                or not all(isinstance(keyword, str) for keyword in keywords)):
+            logger.warning(f"Rejected article with non-scalar field values: {article_data.get('url')}")
+            return None
+        
+        return row
     
     def update_article(self, article_id, update_data):
         """Update an existing article in the database"""
@@ -108,25 +314,15 @@ class ArticleDatabase:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Convert keywords list to JSON string if it's a list
-                if 'keywords' in update_data and isinstance(update_data['keywords'], list):
-                    update_data['keywords'] = json.dumps(update_data['keywords'])
-                
-                # Build SET clause dynamically based on update_data
-                set_clauses = []
-                values = []
-                
-                for key, value in update_data.items():
-                    set_clauses.append(f"{key} = ?")
-                    values.append(value)
+                # Build SET clause from the columns being updated (cached per column set)
+                columns = tuple(update_data.keys())
+                values = [update_data[column] for column in columns]
                 
                 # Add article_id to values
                 values.append(article_id)
                 
                 # Execute the update
-                cursor.execute(f'''
-                UPDATE articles SET {", ".join(set_clauses)} WHERE id = ?
-                ''', values)
+                cursor.execute(_update_article_sql(columns), values)
                 
                 conn.commit()
                 logger.info(f"Updated article ID {article_id}")
@@ -136,31 +332,24 @@ class ArticleDatabase:
             logger.error(f"Error updating article: {e}")
             return False
     
+    def _fetch_articles(self, cursor):
+        """Fetch article rows as dicts (keywords are decoded by the JSON converter)"""
+        return [dict(row) for row in cursor]
+    
     def get_unprocessed_articles(self, limit=10):
         """Get articles that haven't been processed yet"""
         try:
             with self.get_connection() as conn:
-                conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
-                cursor.execute('''
-                SELECT * FROM articles 
+                cursor.execute(f'''
+                SELECT {_ARTICLES_COLUMNS} FROM articles 
                 WHERE processed = FALSE
                 ORDER BY discovery_date DESC
                 LIMIT ?
                 ''', (limit,))
                 
-                articles = [dict(row) for row in cursor.fetchall()]
-                
-                # Convert JSON keywords string back to list
-                for article in articles:
-                    if article['keywords'] and article['keywords'].startswith('['):
-                        try:
-                            article['keywords'] = json.loads(article['keywords'])
-                        except:
-                            pass
-                
-                return articles
+                return self._fetch_articles(cursor)
                 
         except Exception as e:
             logger.error(f"Error getting unprocessed articles: {e}")
@@ -170,66 +359,109 @@ class ArticleDatabase:
         """Get the most recently processed articles"""
         try:
             with self.get_connection() as conn:
-                conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
-                cursor.execute('''
-                SELECT * FROM articles 
+                cursor.execute(f'''
+                SELECT {_ARTICLES_COLUMNS} FROM articles 
                 WHERE processed = TRUE
                 ORDER BY discovery_date DESC
                 LIMIT ?
                 ''', (limit,))
                 
-                articles = [dict(row) for row in cursor.fetchall()]
-                
-                # Convert JSON keywords string back to list
-                for article in articles:
-                    if article['keywords'] and article['keywords'].startswith('['):
-                        try:
-                            article['keywords'] = json.loads(article['keywords'])
-                        except:
-                            pass
-                
-                return articles
+                return self._fetch_articles(cursor)
                 
         except Exception as e:
             logger.error(f"Error getting recent articles: {e}")
             return []
     
-    def search_articles(self, query, limit=20):
-        """Search articles by title, summary, or keywords"""
+    def register_formatters(self, format_date, format_summary):
+        """Register the display formatters used by recent_articles_json as SQL functions
+        
+        Call once at startup: re-registering a function expires every prepared
+        statement on the connection.
+        """
+        with self._lock:
+            self._conn.create_function("format_date", 1, format_date, deterministic=True)
+            self._conn.create_function("format_summary", 1, format_summary, deterministic=True)
+            self._formatters_registered = True
+    
+    def recent_articles_json(self, limit):
+        """Get the most recently processed articles as a JSON array built by SQLite
+        
+        The formatters from register_formatters fill the formatted_date and
+        formatted_summary fields from each article's publication date and summary.
+        Returns None if the query fails.
+        """
+        if not self._formatters_registered:
+            raise RuntimeError("register_formatters() must be called before recent_articles_json()")
+        
         try:
             with self.get_connection() as conn:
-                conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
                 cursor.execute('''
-                SELECT * FROM articles 
-                WHERE processed = TRUE
-                AND (
-                    title LIKE ? 
-                    OR summary LIKE ? 
-                    OR keywords LIKE ?
+                SELECT json_group_array(json_object(
+                    'id', id,
+                    'title', title,
+                    'url', url,
+                    'source', source,
+                    'publication_date', publication_date,
+                    'discovery_date', discovery_date,
+                    'summary', summary,
+                    'score', score,
+                    'keywords', CASE WHEN json_valid(keywords) THEN json(keywords) ELSE json('[]') END,
+                    'content_snippet', content_snippet,
+                    'processed', processed,
+                    'formatted_date', format_date(COALESCE(publication_date, '')),
+                    'formatted_summary', format_summary(COALESCE(summary, ''))
+                ))
+                FROM (
+                    SELECT * FROM articles
+                    WHERE processed = TRUE
+                    ORDER BY discovery_date DESC
+                    LIMIT ?
                 )
-                ORDER BY score DESC
-                LIMIT ?
-                ''', (f'%{query}%', f'%{query}%', f'%{query}%', limit))
+                ''', (limit,))
                 
-                articles = [dict(row) for row in cursor.fetchall()]
+                return cursor.fetchone()[0]
                 
-                # Convert JSON keywords string back to list
-                for article in articles:
-                    if article['keywords'] and article['keywords'].startswith('['):
-                        try:
-                            article['keywords'] = json.loads(article['keywords'])
-                        except:
-                            pass
+        except Exception as e:
+            logger.error(f"Error getting recent articles: {e}")
+            return None
+    
+    def search_articles(self, query, limit=20):
+        """Search articles by title, summary, or keywords (None if the query fails)"""
+        match_query = self._build_match_query(query)
+        if not match_query:
+            return []
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
                 
-                return articles
+                cursor.execute(f'''
+                SELECT {_ARTICLES_COLUMNS_A} FROM articles_fts
+                JOIN articles a ON a.id = articles_fts.rowid
+                WHERE articles_fts MATCH ?
+                AND a.processed = TRUE
+                ORDER BY bm25(articles_fts)
+                LIMIT ?
+                ''', (match_query, limit))
+                
+                return self._fetch_articles(cursor)
                 
         except Exception as e:
             logger.error(f"Error searching articles: {e}")
-            return []
+            return None
+    
+    def _build_match_query(self, query):
+        """Turn free-text user input into an FTS5 query matching every term as a prefix
+        
+        Terms only match at the start of a word: "quant" finds "quantum", but
+        "physics" no longer finds "astrophysics" as the old LIKE '%q%' search did.
+        """
+        terms = query.split()
+        return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
     
     def update_statistics(self):
         """Update the statistics table with current data"""
@@ -239,54 +471,30 @@ class ArticleDatabase:
                 
                 today = datetime.now().date().isoformat()
                 
-                # Get statistics for today
+                # Get statistics for today in a single pass over today's articles
                 cursor.execute('''
-                SELECT COUNT(*) as articles_found
+                SELECT
+                    COUNT(*) as articles_found,
+                    COALESCE(SUM(processed = TRUE), 0) as articles_processed,
+                    AVG(CASE WHEN processed = TRUE THEN score END) as avg_score
                 FROM articles 
-                WHERE DATE(discovery_date) = ?
+                WHERE discovery_day = ?
                 ''', (today,))
-                articles_found = cursor.fetchone()[0]
+                articles_found, articles_processed, avg_score = cursor.fetchone()
+                avg_score = avg_score or 0.0
                 
+                # Get top 5 keywords, tallied by SQLite over each article's JSON keyword list
                 cursor.execute('''
-                SELECT COUNT(*) as articles_processed
-                FROM articles 
-                WHERE DATE(discovery_date) = ?
-                AND processed = TRUE
+                SELECT kw.value as keyword, COUNT(*) as keyword_count
+                FROM articles a,
+                    json_each(CASE WHEN json_valid(a.keywords) THEN a.keywords ELSE '[]' END) kw
+                WHERE a.discovery_day = ?
+                AND a.processed = TRUE
+                GROUP BY kw.value
+                ORDER BY keyword_count DESC, kw.value
+                LIMIT 5
                 ''', (today,))
-                articles_processed = cursor.fetchone()[0]
-                
-                cursor.execute('''
-                SELECT AVG(score) as avg_score
-                FROM articles 
-                WHERE DATE(discovery_date) = ?
-                AND processed = TRUE
-                ''', (today,))
-                avg_score = cursor.fetchone()[0] or 0.0
-                
-                # Get top keywords (this is simplified)
-                cursor.execute('''
-                SELECT keywords
-                FROM articles 
-                WHERE DATE(discovery_date) = ?
-                AND processed = TRUE
-                ''', (today,))
-                
-                all_keywords = []
-                for row in cursor.fetchall():
-                    if row[0] and row[0].startswith('['):
-                        try:
-                            keywords = json.loads(row[0])
-                            all_keywords.extend(keywords)
-                        except:
-                            pass
-                
-                # Count keyword frequency and get top 5
-                keyword_counts = {}
-                for keyword in all_keywords:
-                    keyword_counts[keyword] = keyword_counts.get(keyword, 0) + 1
-                
-                top_keywords = sorted(keyword_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-                top_keywords_json = json.dumps([k for k, v in top_keywords])
+                top_keywords = [row['keyword'] for row in cursor.fetchall()]
                 
                 # Check if stats for today already exist
                 cursor.execute('''
@@ -305,14 +513,14 @@ class ArticleDatabase:
                     avg_score = ?,
                     top_keywords = ?
                     WHERE date = ?
-                    ''', (articles_found, articles_processed, avg_score, top_keywords_json, today))
+                    ''', (articles_found, articles_processed, avg_score, top_keywords, today))
                 else:
                     # Insert new stats
                     cursor.execute('''
                     INSERT INTO statistics (
                         date, articles_found, articles_processed, avg_score, top_keywords
                     ) VALUES (?, ?, ?, ?, ?)
-                    ''', (today, articles_found, articles_processed, avg_score, top_keywords_json))
+                    ''', (today, articles_found, articles_processed, avg_score, top_keywords))
                 
                 conn.commit()
                 logger.info(f"Updated statistics for {today}")
@@ -323,31 +531,66 @@ class ArticleDatabase:
             return False
     
     def get_statistics(self, days=7):
-        """Get recent statistics"""
+        """Get recent statistics (None if the query fails)"""
         try:
             with self.get_connection() as conn:
-                conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
+                # Let SQLite unpack the top_keywords JSON array into a separator-joined string
                 cursor.execute('''
-                SELECT *
+                SELECT id, date, articles_found, articles_processed, avg_score,
+                    CASE WHEN json_valid(top_keywords) THEN (
+                        SELECT group_concat(value, CHAR(31)) FROM json_each(top_keywords)
+                    ) END as top_keywords
                 FROM statistics
                 ORDER BY date DESC
                 LIMIT ?
                 ''', (days,))
                 
-                stats = [dict(row) for row in cursor.fetchall()]
-                
-                # Convert JSON top_keywords string back to list
-                for stat in stats:
-                    if stat['top_keywords'] and stat['top_keywords'].startswith('['):
-                        try:
-                            stat['top_keywords'] = json.loads(stat['top_keywords'])
-                        except:
-                            pass
+                stats = []
+                for row in cursor:
+                    stat = dict(row)
+                    top_keywords = stat['top_keywords']
+                    stat['top_keywords'] = top_keywords.split('\x1f') if top_keywords else []
+                    stats.append(stat)
                 
                 return stats
                 
         except Exception as e:
             logger.error(f"Error getting statistics: {e}")
-            return []
+            return None
+    
+    def get_keywords(self, limit=1000):
+        """Get the sorted unique keywords of the most recently processed articles (None if the query fails)"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                
+                # Let SQLite unpack, dedupe and sort the keyword lists
+                cursor.execute('''
+                SELECT DISTINCT kw.value as keyword
+                FROM (
+                    SELECT keywords FROM articles
+                    WHERE processed = TRUE
+                    ORDER BY discovery_date DESC
+                    LIMIT ?
+                ) a,
+                    json_each(CASE WHEN json_valid(a.keywords) THEN a.keywords ELSE '[]' END) kw
+                ORDER BY kw.value
+                ''', (limit,))
+                
+                return [row['keyword'] for row in cursor]
+                
+        except Exception as e:
+            logger.error(f"Error getting keywords: {e}")
+            return None
+    
+    def get_data_version(self):
+        """Get a counter that changes whenever another connection commits to the database"""
+        try:
+            with self._lock:
+                return self._conn.execute("PRAGMA data_version").fetchone()[0]
+                
+        except Exception as e:
+            logger.error(f"Error getting data version: {e}")
+            return None
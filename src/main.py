@@ -8,7 +8,6 @@ from loguru import logger
 load_dotenv()
 
 # Import after loading environment variables
-from agent import PhysicsArticleCurator
 from web_server import run_server
 
 def start_web_server():
@@ -25,6 +24,9 @@ def start_agent(run_once=False):
     """Start the agent in the main thread"""
     logger.info("Starting physics article curator agent")
     
+    # Imported here so web-only mode never loads the OpenAI client stack
+    from agent import PhysicsArticleCurator
+    
     # Create and configure the agent
     agent = PhysicsArticleCurator()
     
@@ -57,10 +59,9 @@ def main():
     
     if web_only:
         logger.info("Running in web-only mode (no agent)")
-        # Keep the main thread alive
+        # Keep the main thread alive until the web server exits
         try:
-            while True:
-                time.sleep(60)
+            web_thread.join()
         except KeyboardInterrupt:
             logger.info("Application stopped by user")
     else:
@@ -1,20 +1,94 @@
 import os
-import json
+import threading
+import uuid
+import orjson
 import markdown
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from functools import lru_cache, wraps
+from flask import Flask, Response, request, send_from_directory
 from loguru import logger
 from database import ArticleDatabase
 
+# Use waitress as the production server when it is installed
+try:
+    from waitress import serve
+except ImportError:
+    serve = None
+
+# Compress responses when flask-compress is installed
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
 app = Flask(__name__, 
             static_folder="../web",
             template_folder="../web")
+if Compress is not None:
+    # Static files keep Werkzeug's streaming and conditional GET, so only compress the API
+    app.config['COMPRESS_MIMETYPES'] = ['application/json']
+    Compress(app)
+
 db = ArticleDatabase()
 
+def json_response(data):
+    """Serialize data with orjson into a JSON response"""
+    return Response(orjson.dumps(data), mimetype='application/json')
+
+def failed_read_response():
+    """Empty result for a failed database read, marked so it is never cached or given an ETag"""
+    response = json_response([])
+    response.cache_control.no_store = True
+    return response
+
+# One reusable Markdown converter per server thread
+_markdown_local = threading.local()
+
+@lru_cache(maxsize=1024)
+def render_markdown(text):
+    """Render markdown to HTML, caching results since article summaries don't change once written"""
+    md = getattr(_markdown_local, 'md', None)
+    if md is None:
+        md = _markdown_local.md = markdown.Markdown()
+    return md.reset().convert(text)
+
+# Distinguishes ETags across restarts, since the database data version counter restarts too
+_etag_prefix = uuid.uuid4().hex[:8]
+
+def _etag_variants(etag):
+    """ETag plus the suffixed forms flask-compress gives compressed responses"""
+    return (etag,) + tuple(f"{etag}:{algorithm}" for algorithm in ("gzip", "br", "deflate", "zstd"))
+
+def etag_cached(view):
+    """Answer repeat requests with 304 until the agent writes to the database"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = db.get_data_version()
+        if version is None:
+            return view(*args, **kwargs)
+        
+        etag = f"{_etag_prefix}-{version}"
+        
+        # flask-compress appends the encoding to the ETag of compressed responses
+        if any(request.if_none_match.contains(variant) for variant in _etag_variants(etag)):
+            response = Response(status=304)
+        else:
+            response = view(*args, **kwargs)
+            
+            # Don't let clients revalidate a fallback result against the current data version
+            if response.cache_control.no_store:
+                return response
+        
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
+
 @app.route('/')
 def index():
     """Serve the main index page"""
-    return render_template('index.html')
+    # index.html is plain HTML, so skip Jinja and serve it as a conditional static file
+    return send_from_directory(app.static_folder, 'index.html')
 
 @app.route('/<path:path>')
 def serve_static(path):
@@ -22,86 +96,61 @@ def serve_static(path):
     return send_from_directory(app.static_folder, path)
 
 @app.route('/api/articles/recent')
+@etag_cached
 def recent_articles():
     """Get recent articles from the database"""
     limit = int(request.args.get('limit', 20))
-    articles = db.get_recent_articles(limit=limit)
-    
-    # Format articles for display
-    for article in articles:
-        article['formatted_date'] = format_date(article.get('publication_date', ''))
-        article['formatted_summary'] = markdown.markdown(article.get('summary', ''))
-        
-        # Format keywords as a list if it's a string
-        if isinstance(article.get('keywords'), str):
-            try:
-                article['keywords'] = json.loads(article['keywords'])
-            except:
-                article['keywords'] = []
     
-    return jsonify(articles)
+    # SQLite assembles the JSON document, calling back into Python only for display formatting
+    articles_json = db.recent_articles_json(limit)
+    if articles_json is None:
+        return failed_read_response()
+    return Response(articles_json, mimetype='application/json')
 
 @app.route('/api/articles/search')
+@etag_cached
 def search_articles():
     """Search for articles by query"""
     query = request.args.get('q', '')
     if not query:
-        return jsonify([])
+        return json_response([])
     
     limit = int(request.args.get('limit', 20))
     articles = db.search_articles(query, limit=limit)
+    if articles is None:
+        return failed_read_response()
     
     # Format articles for display
     for article in articles:
         article['formatted_date'] = format_date(article.get('publication_date', ''))
-        article['formatted_summary'] = markdown.markdown(article.get('summary', ''))
-        
-        # Format keywords as a list if it's a string
-        if isinstance(article.get('keywords'), str):
-            try:
-                article['keywords'] = json.loads(article['keywords'])
-            except:
-                article['keywords'] = []
+        article['formatted_summary'] = render_markdown(article.get('summary') or '')
     
-    return jsonify(articles)
+    return json_response(articles)
 
 @app.route('/api/stats')
+@etag_cached
 def get_stats():
     """Get recent statistics"""
     days = int(request.args.get('days', 7))
     stats = db.get_statistics(days=days)
+    if stats is None:
+        return failed_read_response()
     
     # Simple formatting for display
     for stat in stats:
         stat['formatted_date'] = format_date(stat.get('date', ''))
-        
-        # Format top_keywords as a list if it's a string
-        if isinstance(stat.get('top_keywords'), str):
-            try:
-                stat['top_keywords'] = json.loads(stat['top_keywords'])
-            except:
-                stat['top_keywords'] = []
     
-    return jsonify(stats)
+    return json_response(stats)
 
 @app.route('/api/keywords')
+@etag_cached
 def get_keywords():
     """Get all unique keywords for filtering"""
-    articles = db.get_recent_articles(limit=1000)  # Increased limit to get more keywords
-    
-    all_keywords = set()
-    for article in articles:
-        keywords = article.get('keywords', [])
-        if isinstance(keywords, str):
-            try:
-                keywords = json.loads(keywords)
-            except:
-                keywords = []
-        
-        if isinstance(keywords, list):
-            all_keywords.update(keywords)
+    keywords = db.get_keywords(limit=1000)
+    if keywords is None:
+        return failed_read_response()
     
-    return jsonify(sorted(list(all_keywords)))
+    return json_response(keywords)
 
 def format_date(date_str):
     """Format a date string for display"""
@@ -120,9 +169,19 @@ def format_date(date_str):
     except:
         return date_str  # Return original if parsing fails
 
+# Summaries render through the cache, so after the first request the database lock only covers lookups
+db.register_formatters(format_date, render_markdown)
+
 def run_server(host='0.0.0.0', port=5000, debug=False):
     """Run the Flask web server"""
-    app.run(host=host, port=port, debug=debug)
+    if debug or serve is None:
+        if not debug:
+            logger.warning("waitress not installed, falling back to the Flask development server")
+        # Werkzeug's dev server for the debugger and reloader
+        app.run(host=host, port=port, debug=debug, threaded=True)
+    else:
+        # Multi-threaded production WSGI server
+        serve(app, host=host, port=port, threads=8, connection_limit=200, channel_timeout=30)
 
 if __name__ == "__main__":
     # This allows for running the web server directly